@@ -46,29 +46,31 @@ class traj3D:
         """
         # Variables that measure our progress in parsing the optim.xyz file
         xyz_as_list = []  # List of lists containing all frames
-        frame_contents = ""
+        frame_contents = []  # Lines of the current frame, joined once complete
         line_count = 0
         frame_count = 0
         first_line = True  # Marks if we've looked at the atom count yet
 
         # Extract distances, energies, and frame contents from optim.xyz
-        with open(xyz_filename, "r") as trajectory:
+        with open(filename, "r") as trajectory:
             for line in trajectory:
                 # Determine the section length with the atom count in first line
                 if first_line == True:
                     section_length = int(line.strip()) + 2
+                    self.natoms = section_length - 2
                     first_line = False
                 # At the end of the section reset the frame-specific variables
                 if line_count == section_length:
                     line_count = 0
-                    xyz_as_list.append(frame_contents)
-                    frame_contents = ""
+                    xyz_as_list.append("".join(frame_contents))
+                    frame_contents.clear()
                     frame_count += 1
-                frame_contents += line
+                frame_contents.append(line)
                 line_count += 1
-            xyz_as_list.append(frame_contents)
+            xyz_as_list.append("".join(frame_contents))
 
-        print("We found {} frames in {}.".format(len(xyz_as_list), xyz_filename))
+        self.frames = xyz_as_list
+        print("We found {} frames in {}.".format(len(xyz_as_list), filename))
 
 
 def combine_xyz_files():
@@ -1,5 +1,7 @@
 """Module with common user input requests"""
 
+import re
+
 
 def request_frames(xyz_filename):
     """
@@ -18,16 +20,25 @@ def request_frames(xyz_filename):
     # What frames would you like from the first .xyz file?
     if xyz_filename == "combined.xyz":
         return
-    request = input("Which frames do you want from {}?: ".format(xyz_filename))
-    # Continue if the user did not want that file processed and pressed enter
-    if request == "":
-        return request
-    # Check the request and convert it to a list even if it is hyphenated
-    temp = [
-        (lambda sub: range(sub[0], sub[-1] + 1))(list(map(int, ele.split("-"))))
-        for ele in request.split(",")
+    while True:
+        request = input("Which frames do you want from {}?: ".format(xyz_filename))
+        # Continue if the user did not want that file processed and pressed enter
+        if request == "":
+            return request
+        # Every comma-separated token must be a frame or a hyphenated range
+        matches = [
+            re.fullmatch(r"(\d+)\s*(?:-\s*(\d+))?", token.strip())
+            for token in request.split(",")
+        ]
+        if all(matches):
+            break
+        print("Please enter frames as numbers or ranges, e.g. 1,3-5.")
+    # Convert the request to a list even if it is hyphenated
+    frames = [
+        frame
+        for match in matches
+        for frame in range(int(match[1]), int(match[2] or match[1]) + 1)
     ]
-    frames = [b for a in temp for b in a]
 
     print("For {} you requested frames {}.".format(xyz_filename, frames))
 
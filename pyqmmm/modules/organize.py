@@ -1,6 +1,10 @@
 """Module for organizing data types and structures"""
 
 import glob
+import mmap
+import re
+
+import numpy as np
 
 
 def get_xyz_filenames():
@@ -14,26 +18,30 @@ def get_xyz_filenames():
 
     # Get all xyz files and sort them
     file_list = glob.glob("*.xyz")
-    sorted(file_list)
+    file_list.sort()
     xyz_filename_list = []
 
     # Loop through files and check to see if they are trajectories
     for file in file_list:
+        # Scan the file in large chunks rather than line by line
         with open(file, "r") as current_file:
+            buffer = current_file.read(65536)
+            tokens = buffer.split(None, 1)
             trajectory = False
-            first_line = True
-            header_count = 0
+            # Match whole lines so padded counts such as "   23" are also found
+            if tokens:
+                count = re.escape(tokens[0])
+                header = re.compile(r"\n[ \t]*{}[ \t]*\r?\n".format(count))
             # If the atom count appears more than once than it is a trajectory
-            for line in current_file:
-                if first_line:
-                    atom_count = line.strip()
-                    header_count += 1
-                    first_line = False
-                if line.strip() == atom_count:
-                    header_count += 1
-                if header_count > 1:
+            while tokens:
+                if header.search(buffer):
                     trajectory = True
                     break
+                chunk = current_file.read(65536)
+                if not chunk:
+                    break
+                # Keep the last partial line so a split header is still found
+                buffer = buffer[max(buffer.rfind("\n"), 0) :] + chunk
         # Combine all the trajectory files into a single list
         if trajectory:
             xyz_filename_list.append(file)
@@ -58,33 +66,24 @@ def multiframe_xyz_to_list(xyz_filename):
         List containing the trajectory with each frame saved as an element
     """
 
-    # Variables that measure our progress in parsing the optim.xyz file
-    xyz_traj = []  # List of lists containing all frames
-    frame_contents = ""
-    line_count = 0
-    frame_count = 0
-    first_line = True  # Marks if we've looked at the atom count yet
-
-    # Loop through optim.xyz and collect distances, energies and frame contents
-    with open(xyz_filename, "r") as traj:
-        for line in traj:
+    # Map the file so newlines are located by numpy rather than line by line
+    with open(xyz_filename, "rb") as traj:
+        with mmap.mmap(traj.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            buffer = np.frombuffer(data, dtype=np.uint8)
+            newlines = np.flatnonzero(buffer == ord("\n"))
+            del buffer  # Release the view so the map can be closed
             # We determine the section length using the atom count in first line
-            if first_line:
-                section_length = int(line.strip()) + 2
-                first_line = False
-            # At the end of the section reset the frame-specific variables
-            if line_count == section_length:
-                line_count = 0
-                xyz_traj.append(frame_contents)
-                frame_contents = ""
-                frame_count += 1
-            frame_contents += line
-            line_count += 1
-
-        xyz_traj.append(frame_contents)
+            section_length = int(data.readline()) + 2
+            # Every frame ends on the newline of its last atom line
+            bounds = [0, *(newlines[section_length - 1 :: section_length] + 1)]
+            if bounds[-1] < len(data):
+                bounds.append(len(data))
+            xyz_traj = [
+                data[start:end].decode() for start, end in zip(bounds, bounds[1:])
+            ]
 
     # Print statistics of the xyz parsing to the user
-    print(f"We found {xyz_traj} frames in {xyz_filename}.")
+    print(f"We found {len(xyz_traj)} frames in {xyz_filename}.")
 
     return xyz_traj
 
@@ -112,19 +111,19 @@ def combine_xyz_files(
             continue
         # Convert the xyz files to a list
         xyz_list = multiframe_xyz_to_list(file)
+        # Frames are numbered from one and a set gives constant-time lookups
+        requested_frames = set(requested_frames)
         requested_xyz_list = [
             frame
-            for index, frame in enumerate(xyz_list)
-            if index + 1 in requested_frames
+            for index, frame in enumerate(xyz_list, 1)
+            if index in requested_frames
         ]
         # Ask the user if they want the frames reversed for a given xyz file
         reverse = input("Any key to reverse {} else Return: ".format(file))
         if reverse:
-            requested_xyz_list.reverse()
-            reverse = False
+            requested_xyz_list = requested_xyz_list[::-1]
         combined_xyz_list += requested_xyz_list
     # Write the combined trajectories out to a new file called combined.xyz
-    with open(combined_filename, "w") as combined_file:
-        for entry in combined_xyz_list:
-            combined_file.write(entry)
+    with open(combined_filename, "w", buffering=1 << 20) as combined_file:
+        combined_file.writelines(combined_xyz_list)
     print(f"Your combined xyz was written to {combined_filename}.")
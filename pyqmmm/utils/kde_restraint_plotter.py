@@ -9,7 +9,21 @@ import matplotlib.pyplot as plt
 import matplotlib as mpl
 import matplotlib.ticker as ticker
 from scipy.stats import gaussian_kde
-from matplotlib.patches import Rectangle
+from matplotlib.collections import LineCollection, PolyCollection
+
+# Truncated sequential colormaps for each plot color allowed in the config file
+CMAPS = {
+    color: mpl.colors.ListedColormap(
+        getattr(mpl.cm, name)(np.linspace(0, 1, 20))[5:, :-1]
+    )
+    for color, name in [
+        ("blue", "Blues"),
+        ("orange", "Oranges"),
+        ("red", "Reds"),
+        ("grey", "Greys"),
+        ("green", "Greens"),
+    ]
+}
 
 
 def config():
@@ -74,16 +88,26 @@ def combine_inp():
     # Combine the dist and angle files into a single file
     file_array = []
     for num in range(1, num_plots + 1):
-        file_array.append("./2_temp/{num}_combined.dat")
-        with open("./2_temp/{num}_combined.dat", "w") as combined:
-            with open("./1_in/{num}_angles.dat", "r") as ang_file:
-                with open("./1_in/{num}_distances.dat", "r") as dist_file:
-                    for ang_line, dist_line in zip(ang_file, dist_file):
-                        if "#" in ang_line:
-                            continue
-                        angle = ang_line.split()[1]
-                        dist = dist_line.split()[1]
-                        combined.write("{dist} {angle}\n")
+        combined_filename = f"./2_temp/{num}_combined.dat"
+        ang_filename = f"./1_in/{num}_angles.dat"
+        dist_filename = f"./1_in/{num}_distances.dat"
+        file_array.append(combined_filename)
+        # Skip the pair if the combined file is newer than both of its sources
+        if os.path.exists(combined_filename):
+            source_mtime = max(
+                os.path.getmtime(ang_filename), os.path.getmtime(dist_filename)
+            )
+            if os.path.getmtime(combined_filename) >= source_mtime:
+                continue
+        # Only the second column holds the measurement in CPPTraj outputs
+        angles = np.loadtxt(ang_filename, comments="#", usecols=1, ndmin=1)
+        dists = np.loadtxt(dist_filename, comments="#", usecols=1, ndmin=1)
+        frames = min(angles.size, dists.size)
+        np.savetxt(
+            combined_filename,
+            np.column_stack([dists[:frames], angles[:frames]]),
+            fmt="%s",
+        )
 
     return file_array
 
@@ -104,22 +128,13 @@ def get_xy_data(filename):
     y : array
         The y-values most likely a list of angles.
     """
-    # Open a file and loop through it splitting by white space
-    with open(filename, "r") as file:
-        x = []
-        y = []
-        for line in file:
-            dist, ang = line.split(" ")
-            x.append(dist)
-            y.append(ang)
-        # Convert the compiled lists into a numpy array
-        x = np.asarray(x, dtype=float)
-        y = np.asarray(y, dtype=float)
-
-        return x, y
-
-
-def collect_xyz_data(filenames):
+    # Parse the two whitespace-separated columns directly into a float array
+    data = np.loadtxt(filename, ndmin=2)
+
+    return data[:, 0], data[:, 1]
+
+
+def collect_xyz_data(filenames, max_kde_points=5000):
     """
     Retrieves the x and y data from the files.
 
@@ -127,6 +142,8 @@ def collect_xyz_data(filenames):
     ----------
     filenames : list
         List of the combined file names that were generated.
+    max_kde_points : int
+        Largest number of points used to fit the KDE; larger sets are subsampled.
 
     Returns
     -------
@@ -147,8 +164,15 @@ def collect_xyz_data(filenames):
         x, y = get_xy_data(filename)
         # Makes a color 2D scatter and class calculate the point density
         xy_matrix = np.vstack([x, y])
+        # Fitting on every frame is O(N^2), so fit on a subsample for long runs
+        if x.size > max_kde_points:
+            rng = np.random.default_rng(0)
+            index = rng.choice(x.size, max_kde_points, replace=False)
+            kde = gaussian_kde(xy_matrix[:, index])
+        else:
+            kde = gaussian_kde(xy_matrix)
         # Evaluate the estimated pdf for xy_matrix
-        z = gaussian_kde(xy_matrix)(xy_matrix)
+        z = kde(xy_matrix)
         index = z.argsort()
         x_data.append(x[index])
         y_data.append(y[index])
@@ -180,15 +204,13 @@ def compare_patch_limits(x_data, y_data, patch_params):
     # Unpack the dimensions of the patch
     height_min, height_max, width_min, width_max = patch_params
     # Identify max and min values from x and y data sets
-    x_max = max(x_data)
-    x_min = min(x_data)
-    y_max = max(y_data)
-    y_min = min(y_data)
+    x_max, x_min = x_data.max(), x_data.min()
+    y_max, y_min = y_data.max(), y_data.min()
     # Check if the dataset limits are more extreme than the patch limits
-    xlim_min = x_min if x_min < width_min else width_min
-    xlim_max = x_max if x_max > width_max else width_max
-    ylim_min = y_min if y_min < height_min else height_min
-    ylim_max = y_max if y_max > height_max else height_max
+    xlim_min = min(x_min, width_min)
+    xlim_max = max(x_max, width_max)
+    ylim_min = min(y_min, height_min)
+    ylim_max = max(y_max, height_max)
     # Calculate the padding around the data as one seventh the spread
     y_pad = (ylim_max - ylim_min) / 7
     x_pad = (xlim_max - xlim_min) / 7
@@ -234,29 +256,19 @@ def get_plot_limits(x_data, y_data, plot_params):
         xlim, ylim = compare_patch_limits(x_data[i], y_data[i], patch_params)
 
         # Set the size group so panels indicated in the config file match
-        if size_group not in group_curr_max_min:
-            group_curr_max_min[size_group] = [xlim, ylim]
-        else:
-            xlim_min, xlim_max = xlim
-            ylim_min, ylim_max = ylim
-            group_xlim, group_ylim = group_curr_max_min[size_group]
-            group_xlim_min, group_xlim_max = group_xlim
-            group_ylim_min, group_ylim_max = group_ylim
-            # Check if the dataset limits are more extreme than the group limits
-            xlim_min = xlim_min if xlim_min < group_xlim_min else group_xlim_min
-            xlim_max = xlim_max if xlim_max > group_xlim_max else group_xlim_max
-            ylim_min = ylim_min if ylim_min < group_ylim_min else group_ylim_min
-            ylim_max = ylim_max if ylim_max > group_ylim_max else group_ylim_max
-            # set new mins and maxes
-            xlim = [xlim_min, xlim_max]
-            ylim = [ylim_min, ylim_max]
-            group_curr_max_min[size_group] = [xlim, ylim]
+        lows = np.array([xlim[0], ylim[0]])
+        highs = np.array([xlim[1], ylim[1]])
+        if size_group in group_curr_max_min:
+            group_lows, group_highs = group_curr_max_min[size_group]
+            lows = np.minimum(lows, group_lows)
+            highs = np.maximum(highs, group_highs)
+        group_curr_max_min[size_group] = (lows, highs)
 
     # We have the max and min for each size group and can now return them
     for size in size_group_list:
-        [xlim, ylim] = group_curr_max_min[size]
-        xlims.append(xlim)
-        ylims.append(ylim)
+        lows, highs = group_curr_max_min[size]
+        xlims.append([lows[0], highs[0]])
+        ylims.append([lows[1], highs[1]])
 
     return xlims, ylims
 
@@ -314,18 +326,7 @@ def graph_datasets(x_data, y_data, z_data, labels, plot_params, show_crosshairs)
     for i in range(len(x_data)):
 
         # Parse the config dictionary for the color of each plot
-        color = plot_params[i]["color"]
-        if color == "blue":
-            cmap = mpl.cm.Blues(np.linspace(0, 1, 20))
-        elif color == "orange":
-            cmap = mpl.cm.Oranges(np.linspace(0, 1, 20))
-        elif color == "red":
-            cmap = mpl.cm.Reds(np.linspace(0, 1, 20))
-        elif color == "grey":
-            cmap = mpl.cm.Greys(np.linspace(0, 1, 20))
-        elif color == "green":
-            cmap = mpl.cm.Greens(np.linspace(0, 1, 20))
-        cmap = mpl.colors.ListedColormap(cmap[5:, :-1])
+        cmap = CMAPS[plot_params[i]["color"]]
 
         # Set the max and min values of the current plot as variables
         height_min = plot_params[i]["height_min"]
@@ -337,46 +338,53 @@ def graph_datasets(x_data, y_data, z_data, labels, plot_params, show_crosshairs)
         xlim = xlims[i]
         # ylim = ylims[i]
 
-        # Create a scatter plot
+        # Create a scatter plot rasterized to a single image in the vector PDF
         axes = ax[i] if len(x_data) > 1 else ax
         axes.scatter(
-            x_data[i], y_data[i], c=z_data[i], s=40, vmin=0, vmax=0.30, cmap=cmap
+            x_data[i],
+            y_data[i],
+            c=z_data[i],
+            s=40,
+            vmin=0,
+            vmax=0.30,
+            cmap=cmap,
+            rasterized=True,
         )
         axes.set_xlim(xlim)  # Axis limits
 
         if show_crosshairs:
-            # Calculate the dimensions for the patch and define patch
-            anchor = (width_min, height_min)
-            width = width_max - width_min
-            height = height_max - height_min
-            axes.add_patch(
-                Rectangle(
-                    anchor,
-                    width,
-                    height,
-                    fill=False,
-                    color="k",
-                    linestyle="--",
-                    linewidth=2.0,
-                    joinstyle="miter",
-                )
+            # Define the dashed patch outline as a closed path for mitered corners
+            outline = PolyCollection(
+                [
+                    [
+                        (width_min, height_min),
+                        (width_max, height_min),
+                        (width_max, height_max),
+                        (width_min, height_max),
+                    ]
+                ],
+                closed=True,
+                facecolors="none",
+                edgecolors="k",
+                linestyles="--",
+                linewidths=2.0,
+                joinstyle="miter",
             )
 
             # Define where to place the crosshairs of the patch
             width_avg = np.average([width_max, width_min])
             height_avg = np.average([height_max, height_min])
-            axes.plot(
-                (width_min, width_max),
-                (height_avg, height_avg),
-                color="k",
-                linewidth=2.0,
-            )
-            axes.plot(
-                (width_avg, width_avg),
-                (height_min, height_max),
-                color="k",
-                linewidth=2.0,
+            crosshairs = LineCollection(
+                [
+                    [(width_min, height_avg), (width_max, height_avg)],
+                    [(width_avg, height_min), (width_avg, height_max)],
+                ],
+                colors="k",
+                linewidths=2.0,
             )
+            # Add the collections without triggering an autoscale
+            axes.add_collection(outline, autolim=False)
+            axes.add_collection(crosshairs, autolim=False)
 
         # Set the ticks as the y and x limits
         xlim_min, xlim_max = xlim
@@ -388,7 +396,9 @@ def graph_datasets(x_data, y_data, z_data, labels, plot_params, show_crosshairs)
         axes.tick_params(which="minor", length=5, color="k", width=2.5)
 
     #     plt.savefig("./3_out/restraints_kde.png", dpi=600, bbox_inches="tight", transparent=True)
-    plt.savefig("./3_out/restraints_kde.pdf", bbox_inches="tight", transparent=True)
+    plt.savefig(
+        "./3_out/restraints_kde.pdf", dpi=300, bbox_inches="tight", transparent=True
+    )
 
 
 ############################## HYSCORE PLOTTER #################################
@@ -1,54 +1,56 @@
 """Swap any two atoms in an xyz."""
 
+import mmap
+
+import numpy as np
+
 
 def get_atom(which):
     """
     Get atoms from user.
     """
-    atom = input(f"What is the {which} atom?")
-    try:
-        return int(atom)
-    except SystemExit:
-        print("Please enter a number.")
-        return get_atom(which)
+    while True:
+        atom = input(f"What is the {which} atom?")
+        try:
+            return int(atom)
+        except ValueError:
+            print("Please enter a number.")
 
 
 def swap_atoms():
     """
     Swap two atoms in an xyz file.
     """
-    lines_lists = []
-    lines_list = []
     atom1 = get_atom("first")
     atom2 = get_atom("second")
-    count_lines_to_skip = True
-    lines_to_skip = 0
     filename = input("What is your xyz file name?")
-    with open("{}.xyz".format(filename), "r") as xyzfile:
-        for line in xyzfile:
-            lines_list.append(line)
-            if len(line.split()) == 4:
-                count_lines_to_skip = False
-            elif count_lines_to_skip:
-                lines_to_skip += 1
-            if (
-                len(line.split()) != 4
-                and not count_lines_to_skip
-                and len(lines_list) > lines_to_skip
-            ):
-                last_line = lines_list.pop()
-                lines_lists.append(lines_list)
-                lines_list = [last_line]
-        lines_lists.append(lines_list)
-
-    with open("{}_{}_{}.xyz".format(filename, atom1, atom2), "w") as newfile:
-        for lines in lines_lists:
-            atom1_line = lines[atom1 + lines_to_skip - 1]
-            atom2_line = lines[atom2 + lines_to_skip - 1]
-            lines[atom2 + lines_to_skip - 1] = atom1_line
-            lines[atom1 + lines_to_skip - 1] = atom2_line
-            for line in lines:
-                newfile.write(line)
+    # Map the file so newlines are located by numpy rather than line by line
+    with open("{}.xyz".format(filename), "rb") as xyzfile:
+        with mmap.mmap(xyzfile.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            buffer = np.frombuffer(data, dtype=np.uint8)
+            line_ends = np.flatnonzero(buffer == ord("\n")) + 1
+            del buffer  # Release the view so the map can be closed
+            if line_ends.size == 0 or line_ends[-1] < len(data):
+                line_ends = np.append(line_ends, len(data))
+            line_starts = np.concatenate(([0], line_ends[:-1]))
+
+            # Every frame is the atom count, a comment line, and then the atoms
+            stride = int(data.readline()) + 2
+            frame_count = line_ends.size // stride
+            order = np.arange(frame_count * stride).reshape(frame_count, stride)
+            # Swap the two atom columns across all frames at once
+            order[:, [atom1 + 1, atom2 + 1]] = order[:, [atom2 + 1, atom1 + 1]]
+            # Keep any lines after the last full frame, such as a partial frame
+            leftover = np.arange(frame_count * stride, line_ends.size)
+            if leftover.size:
+                print(f"Copied {leftover.size} lines after the last full frame as is.")
+            order = np.concatenate((order.ravel(), leftover))
+
+            newname = "{}_{}_{}.xyz".format(filename, atom1, atom2)
+            with open(newname, "wb") as newfile:
+                newfile.writelines(
+                    data[line_starts[i] : line_ends[i]] for i in order
+                )
 
 
 # Collect energies into .csv file and create a dataframe
@@ -7,6 +7,11 @@
 # The script will generate a new combined file.
 
 import glob
+import mmap
+import re
+
+import numpy as np
+
 import reaction_coordinate_collector
 
 
@@ -26,26 +31,30 @@ def get_xyz_filenames():
     """
     # Get all xyz files and sort them
     file_list = glob.glob("*.xyz")
-    sorted(file_list)
+    file_list.sort()
     xyz_filename_list = []
 
     # Loop through files and check to see if they are trajectories
     for file in file_list:
+        # Scan the file in large chunks rather than line by line
         with open(file, "r") as current_file:
+            buffer = current_file.read(65536)
+            tokens = buffer.split(None, 1)
             trajectory = False
-            first_line = True
-            header_count = 0
+            # Match whole lines so padded counts such as "   23" are also found
+            if tokens:
+                count = re.escape(tokens[0])
+                header = re.compile(r"\n[ \t]*{}[ \t]*\r?\n".format(count))
             # If the atom count appears more than once than it is a trajectory
-            for line in current_file:
-                if first_line == True:
-                    atom_count = line.strip()
-                    header_count += 1
-                    first_line = False
-                if line.strip() == atom_count:
-                    header_count += 1
-                if header_count > 1:
+            while tokens:
+                if header.search(buffer):
                     trajectory = True
                     break
+                chunk = current_file.read(65536)
+                if not chunk:
+                    break
+                # Keep the last partial line so a split header is still found
+                buffer = buffer[max(buffer.rfind("\n"), 0) :] + chunk
         # Combine all the trajectory files into a single list
         if trajectory == True:
             xyz_filename_list.append(file)
@@ -73,16 +82,25 @@ def request_frames(xyz_filename):
     # What frames would you like from the first .xyz file?
     if xyz_filename == "combined.xyz":
         return
-    request = input("Which frames do you want from {}?: ".format(xyz_filename))
-    # Continue if the user did not want that file processed and pressed enter
-    if request == "":
-        return request
-    # Check the request and convert it to a list even if it is hyphenated
-    temp = [
-        (lambda sub: range(sub[0], sub[-1] + 1))(list(map(int, ele.split("-"))))
-        for ele in request.split(",")
+    while True:
+        request = input("Which frames do you want from {}?: ".format(xyz_filename))
+        # Continue if the user did not want that file processed and pressed enter
+        if request == "":
+            return request
+        # Every comma-separated token must be a frame or a hyphenated range
+        matches = [
+            re.fullmatch(r"(\d+)\s*(?:-\s*(\d+))?", token.strip())
+            for token in request.split(",")
+        ]
+        if all(matches):
+            break
+        print("Please enter frames as numbers or ranges, e.g. 1,3-5.")
+    # Convert the request to a list even if it is hyphenated
+    frames = [
+        frame
+        for match in matches
+        for frame in range(int(match[1]), int(match[2] or match[1]) + 1)
     ]
-    frames = [b for a in temp for b in a]
 
     print("For {} you requested frames {}.".format(xyz_filename, frames))
 
@@ -103,30 +121,21 @@ def multiframe_xyz_to_list(xyz_filename):
     trajectory_list : list
         List of lists containing the trajectory with each frame saved as an element.
     """
-    # Variables that measure our progress in parsing the optim.xyz file
-    xyz_as_list = []  # List of lists containing all frames
-    frame_contents = ""
-    line_count = 0
-    frame_count = 0
-    first_line = True  # Marks if we've looked at the atom count yet
-
-    # Loop through optim.xyz and collect distances, energies and frame contents
-    with open(xyz_filename, "r") as trajectory:
-        for line in trajectory:
+    # Map the file so newlines are located by numpy rather than line by line
+    with open(xyz_filename, "rb") as trajectory:
+        with mmap.mmap(trajectory.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            buffer = np.frombuffer(data, dtype=np.uint8)
+            newlines = np.flatnonzero(buffer == ord("\n"))
+            del buffer  # Release the view so the map can be closed
             # We determine the section length using the atom count in first line
-            if first_line == True:
-                section_length = int(line.strip()) + 2
-                first_line = False
-            # At the end of the section reset the frame-specific variables
-            if line_count == section_length:
-                line_count = 0
-                xyz_as_list.append(frame_contents)
-                frame_contents = ""
-                frame_count += 1
-            frame_contents += line
-            line_count += 1
-
-        xyz_as_list.append(frame_contents)
+            section_length = int(data.readline()) + 2
+            # Every frame ends on the newline of its last atom line
+            bounds = [0, *(newlines[section_length - 1 :: section_length] + 1)]
+            if bounds[-1] < len(data):
+                bounds.append(len(data))
+            xyz_as_list = [
+                data[start:end].decode() for start, end in zip(bounds, bounds[1:])
+            ]
 
     print("We found {} frames in {}.".format(len(xyz_as_list), xyz_filename))
 
@@ -150,21 +159,21 @@ def combine_xyz_files():
             continue
         # Convert the xyz files to a list
         xyz_list = multiframe_xyz_to_list(file)
+        # Frames are numbered from one and a set gives constant-time lookups
+        requested_frames = set(requested_frames)
         requested_xyz_list = [
             frame
-            for index, frame in enumerate(xyz_list)
-            if index + 1 in requested_frames
+            for index, frame in enumerate(xyz_list, 1)
+            if index in requested_frames
         ]
         # Ask the user if they want the frames reversed for a given xyz file
         reverse = input("Any key to reverse {} else Return: ".format(file))
         if reverse:
-            requested_xyz_list.reverse()
-            reverse = False
+            requested_xyz_list = requested_xyz_list[::-1]
         combined_xyz_list += requested_xyz_list
     # Write the combined trajectories out to a new file called combined.xyz
-    with open(combined_filename, "w") as combined_file:
-        for entry in combined_xyz_list:
-            combined_file.write(entry)
+    with open(combined_filename, "w", buffering=1 << 20) as combined_file:
+        combined_file.writelines(combined_xyz_list)
     print("Your combined xyz was written to {}\n".format(combined_filename))
 
 